@@ -13,12 +13,13 @@ def fraction_rel_comp(A, B):
     complement of set B.
 
     """
-    return len(A - B) / len(A)
+    return (len(A) - len(A & B)) / len(A)
 
 
 def jaccard_similarity(A, B):
     """Return the Jaccard similarity between sets A and B."""
-    return len(A & B) / len(A | B)
+    common = len(A & B)
+    return common / (len(A) + len(B) - common)
 
 
 def main():
@@ -2,7 +2,6 @@
 
 
 import numpy as np
-from random import random
 from readfasta import Reader
 from sigthrd import thresholds
 from freqsubseq import frequent_patterns, Counter, ExceedAllocatedMemory
@@ -26,17 +25,17 @@ def experiment(prob):
 
     """
     # Sample sequences and compute its total number of nucleotides
-    seq_IDs = [idx for idx in range(NUM_SEQ) if random() < prob]
+    seq_IDs = np.flatnonzero(np.random.random(NUM_SEQ) < prob).tolist()
     data = Reader(FILEPATH, seq_IDs)
-    num_nc = sum([len(seq) for seq in data.items()])
+    num_nc = data.total_length()
     len_thrd = thresholds(num_nc, MIN_LEN, THRD, CONF)
 
     # Re-sample if the minimum pattern length does not have a threshold of
     # significance
     while MIN_LEN not in len_thrd.keys():
-        seq_IDs = [idx for idx in range(NUM_SEQ) if random() < prob]
+        seq_IDs = np.flatnonzero(np.random.random(NUM_SEQ) < prob).tolist()
         data = Reader(FILEPATH, seq_IDs)
-        num_nc = sum([len(seq) for seq in data.items()])
+        num_nc = data.total_length()
         len_thrd = thresholds(num_nc, MIN_LEN, THRD, CONF)
 
     # Obtain the maximum pattern length of significance that satisfies the
@@ -1,14 +1,22 @@
 """Algorithms for mining frequent contiguous sequential patterns in genomes."""
 
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+from readfasta import NUCLEOTIDES, INVALID, ENCODING
 import logging
 
 logging.basicConfig(format='%(asctime)s - %(message)s', level=logging.INFO)
 
 # Global variable
-NUCLEOTIDES = ('A', 'C', 'T', 'G')
+MAX_CODE_LEN = 32  # Maximum length of patterns packed into 64-bit codes
+DIRECT_LEN = 12  # Maximum length of patterns counted in a table of all codes
+BLOCK_LEN = 2**20  # Number of subsequences encoded at once in a pass
 MEM_QUEUE = 8 * 10**9  # Amount of memory for queue
-MEM_PER_ELEM = 80  # Amount of memory used for every element in the queue
+# Memory per queue element, as two buffer sets of three int32 arrays that are
+# swapped between iterations, plus the peak of temporaries in run_position
+MEM_PER_ELEM = 2 * 3 * 4 + 44
 MAX_SIZE = int(round(MEM_QUEUE / MEM_PER_ELEM))  # Maximum size of the queue
 
 
@@ -26,10 +34,13 @@ class Tree:
     """
     Root of a (sub)tree that store information of sequential patterns, where
     a node representing a length m pattern has the parent as its length (m-1)
-    prefix.
+    prefix. Children are stored in a dictionary keyed by the nucleotide that
+    appends the pattern.
 
     """
 
+    __slots__ = ('seq', 'children', 'count', 'idx')
+
     def __init__(self, seq=''):
         """
         Initiate the root of a (sub)tree.
@@ -40,6 +51,7 @@ class Tree:
             Sequential pattern representation of the node. Default to ''.
         """
         self.seq = seq
+        self.children = dict()
 
     def has_child(self, nc):
         """
@@ -52,7 +64,7 @@ class Tree:
             Last nucleotide of child pattern, if any.
 
         """
-        return hasattr(self, nc)
+        return nc in self.children
 
     def child(self, nc):
         """
@@ -65,10 +77,10 @@ class Tree:
             Last nucleotide of child pattern, if any.
 
         """
-        if self.has_child(nc):
-            return getattr(self, nc)
-        else:
-            raise PatternNotFound
+        try:
+            return self.children[nc]
+        except KeyError:
+            raise PatternNotFound from None
 
     def add(self, seq, count=None, attr_val=None):
         """
@@ -85,25 +97,26 @@ class Tree:
             integer or initiate its attribute of count.
 
         attr_val: dict or None
-            Dictionary mapping from attribute names to corresponding values. If
-            not None, initiate the attributes at the target node with given
-            values.
+            Dictionary mapping from attribute names (either 'count' or 'idx')
+            to corresponding values. If not None, initiate the attributes at
+            the target node with given values.
 
         """
-        # If the pattern suffix is empty, update the current node
-        if len(seq) == 0:
-            if count is not None:
-                self.count = self.count + count if hasattr(self, 'count') else count
-            if attr_val is not None:
-                for k, v in attr_val.items():
-                    setattr(self, k, v)
-        # Otherwise, add suffix to the appropriate child
-        else:
-            nc = seq[0]
-            # Build the appropriate if one does not exist
-            if not hasattr(self, nc):
-                setattr(self, nc, Tree(self.seq + nc))
-            self.child(nc).add(seq[1:], count, attr_val)
+        # Walk down to the target node, building the appropriate children if
+        # they do not exist
+        node = self
+        for nc in seq:
+            children = node.children
+            if nc not in children:
+                children[nc] = Tree(node.seq + nc)
+            node = children[nc]
+
+        # Update the target node
+        if count is not None:
+            node.count = getattr(node, 'count', 0) + count
+        if attr_val is not None:
+            for k, v in attr_val.items():
+                setattr(node, k, v)
 
     def pattern(self, seq):
         """
@@ -114,16 +127,16 @@ class Tree:
             Sequential pattern suffix to search for.
 
         """
-        # If the pattern suffix is empty, return current node.
-        if len(seq) == 0:
-            return self
-        # Otherwise, search for an appropriate child
-        else:
-            nc = seq[0]
-            if not self.has_child(nc):
-                raise PatternNotFound
-            else:
-                return self.child(nc).pattern(seq[1:])
+        # Look up the children dictionaries directly rather than through
+        # child(), which saves a method call per nucleotide
+        node = self
+        try:
+            for nc in seq:
+                node = node.children[nc]
+        except KeyError:
+            raise PatternNotFound from None
+
+        return node
 
     def increment_count(self, seq, count):
         """
@@ -139,11 +152,12 @@ class Tree:
             Amount of count increment.
 
         """
-        try:
-            node = self.pattern(seq)
-            node.count = node.count + count if hasattr(node, 'count') else count
-        except PatternNotFound:
-            pass
+        node = self
+        for nc in seq:
+            node = node.children.get(nc)
+            if node is None:
+                return
+        node.count = getattr(node, 'count', 0) + count
 
     def has_count_at_least(self, thrd):
         """Retrun whether the node has count not less than the threshold."""
@@ -151,18 +165,20 @@ class Tree:
 
     def all_children(self):
         """Return a generator of all children of the current node."""
+        children = self.children
         for nc in NUCLEOTIDES:
-            if self.has_child(nc):
-                yield self.child(nc)
+            if nc in children:
+                yield children[nc]
 
     def all_nodes(self):
         """Return a generator of all nodes in the (sub)tree."""
-        # Yield itself
-        yield self
-        # and traverse all nodes in its children's subtree
-        for child in self.all_children():
-            for node in child.all_nodes():
-                yield node
+        # Depth-first traversal from itself, where children are pushed in
+        # reversed order so that they are visited in the order of NUCLEOTIDES
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(list(node.all_children())))
 
     def all_patterns_at_least(self, thrd):
         """
@@ -184,14 +200,12 @@ class Tree:
             Level at which nodes are extracted.
 
         """
-        # If at level 0, yield the current node
-        if level == 0:
-            yield self
-        # Otherwise, search in its children's subtree
-        else:
-            for child in self.all_children():
-                for node in child.nodes_at_level(level - 1):
-                    yield node
+        # Expand the nodes one level at a time, starting from the current node
+        nodes = [self]
+        for _ in range(level):
+            nodes = [child for node in nodes for child in node.all_children()]
+
+        yield from nodes
 
 
 class Counter:
@@ -212,64 +226,381 @@ def increment(counter):
         counter.increment()
 
 
-def subsequences(seq, _len):
+def encoded(seq):
+    """
+    Return a numpy array of nucleotide codes of the given sequence, where
+    characters other than nucleotides are encoded as INVALID. The sequence is
+    either a string, bytes or a numpy array that is already encoded.
+
+    """
+    if isinstance(seq, np.ndarray):
+        return seq
+    if isinstance(seq, str):
+        seq = seq.encode('ascii', 'replace')
+    return ENCODING[np.frombuffer(seq, np.uint8)]
+
+
+def pattern_code(seq):
+    """Return the integer code of a sequential pattern."""
+    code = 0
+    for nc in seq:
+        code = (code << 2) | NUCLEOTIDES.index(nc)
+
+    return code
+
+
+def code_pattern(code, _len):
+    """Return the sequential pattern of given length represented by a code."""
+    code = int(code)
+    return ''.join(NUCLEOTIDES[(code >> shift) & 3]
+                   for shift in range(2 * (_len - 1), -1, -2))
+
+
+def kmer_codes(enc, _len, return_pos=False):
+    """
+    Return the codes, and optionally the positions, of all subsequences with
+    given length in an encoded sequence, leaving out the ones that contain
+    invalid characters.
+
+    Parameters
+    ----------
+    enc: numpy array
+        Encoded sequence, as returned by encoded.
+
+    _len: int
+        Length of subsequences, which must not exceed MAX_CODE_LEN.
+
+    return_pos: bool
+        Whether to also return the positions of the subsequences. Default to
+        False.
+
+    Returns
+    -------
+    pos: numpy array
+        First positions of the subsequences in the sequence, only returned if
+        return_pos is True.
+
+    codes: numpy array
+        Codes of the subsequences, each of which packs 2-bit nucleotide codes
+        into an unsigned 64-bit integer.
+
+    """
+    num = max(len(enc) - _len + 1, 0)
+    codes = np.zeros(num, dtype=np.uint64)
+    valid = np.ones(num, dtype=bool)
+    # Shift in the nucleotide at each offset of all windows at once, where the
+    # nucleotides at an offset are a view of the sequence rather than a copy
+    for offset in range(_len):
+        nc = enc[offset:offset + num]
+        valid &= nc != INVALID
+        codes <<= 2
+        codes |= nc
+
+    if return_pos:
+        return np.flatnonzero(valid), codes[valid]
+    else:
+        return codes[valid]
+
+
+def encoded_data(data):
+    """
+    Return all sequences in the data encoded into a single numpy array, where
+    consecutive sequences are separated by an INVALID code, and the positions
+    at which the sequences start in the array.
+
+    """
+    seqs = list(data.items())
+    lengths = np.array([len(seq) for seq in seqs], dtype=np.int64)
+    starts = np.cumsum(lengths + 1) - (lengths + 1)
+    if not seqs:
+        return np.empty(0, dtype=np.uint8), starts
+
+    # Sequences already encoded are copied into place between the separators,
+    # while strings and bytes are joined and encoded at once
+    if isinstance(seqs[0], np.ndarray):
+        enc = np.full(lengths.sum() + len(seqs) - 1, INVALID, dtype=np.uint8)
+        for start, seq in zip(starts.tolist(), seqs):
+            enc[start:start + len(seq)] = seq
+        return enc, starts
+    sep = '\n' if isinstance(seqs[0], str) else b'\n'
+    return encoded(sep.join(seqs)), starts
+
+
+def kmer_counts(enc, _len, processes=1):
+    """
+    Return the codes of distinct subsequences with given length in the encoded
+    data, sorted in ascending order, and their corresponding supports.
+
+    Parameters
+    ----------
+    enc: numpy array
+        Encoded data, as returned by encoded_data.
+
+    _len: int
+        Length of subsequences.
+
+    processes: int
+        Number of worker processes among which the data is split to count
+        subsequences. Default to 1, which counts in the current process.
+
+    Note
+    ----
+    Subsequences are encoded and counted in blocks of the data, so that the
+    memory for codes is bounded by the block size rather than the data size,
+    and the counts of the blocks are merged.
+
+    """
+    if processes > 1:
+        return merged_counts(parallel_counts(enc, _len, processes))
+
+    results = [block_counts(block, _len) for _, block in kmer_blocks(enc, _len)]
+    return results[0] if len(results) == 1 else merged_counts(results)
+
+
+def block_counts(enc, _len):
+    """
+    Return the codes of distinct subsequences with given length in a block of
+    the encoded data, sorted in ascending order, and their supports.
+
+    For short patterns such that all 4^_len possible codes fit in a table no
+    larger than the number of subsequences, supports are counted directly in
+    the table indexed by codes instead of sorting the codes.
+
+    """
+    codes = kmer_codes(enc, _len)
+    if _len <= DIRECT_LEN and 4**_len <= len(codes):
+        counts = np.bincount(codes.astype(np.int64), minlength=4**_len)
+        codes = np.flatnonzero(counts)
+        return codes.astype(np.uint64), counts[codes]
+    else:
+        return np.unique(codes, return_counts=True)
+
+
+def parallel_counts(enc, _len, processes):
     """
-    Return a generator of all subsequences with given length in the given
-    sequence.
+    Return a list of codes and supports of distinct subsequences with given
+    length, each of which is counted by a worker process in a chunk of the
+    encoded data.
+
+    """
+    chunks = [chunk for _, chunk in kmer_blocks(enc, _len, processes)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(kmer_counts, chunks, repeat(_len)))
+
+
+def candidate_counts(enc, _len, cand_codes, processes=1):
+    """
+    Return the supports of candidate subsequences with given length in the
+    encoded data, counted in blocks of the data.
+
+    Parameters
+    ----------
+    enc: numpy array
+        Encoded data, as returned by encoded_data.
+
+    _len: int
+        Length of subsequences.
+
+    cand_codes: numpy array
+        Codes of candidate subsequences, sorted in ascending order.
+
+    processes: int
+        Number of worker processes among which the data is split to count
+        subsequences. Default to 1, which counts in the current process.
 
     """
-    n = len(seq)
-    for i in range(n - _len + 1):
-        yield seq[i:i+_len]
+    if processes > 1:
+        chunks = [chunk for _, chunk in kmer_blocks(enc, _len, processes)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return sum(executor.map(candidate_counts, chunks, repeat(_len),
+                                    repeat(cand_codes)))
 
+    counts = np.zeros(len(cand_codes), dtype=np.int64)
+    for _, block in kmer_blocks(enc, _len):
+        found, loc = searched(kmer_codes(block, _len), cand_codes)
+        counts += np.bincount(loc[found], minlength=len(cand_codes))
+
+    return counts
+
+
+def kmer_blocks(enc, _len, num_blocks=None):
+    """
+    Return a list of offsets and views of consecutive blocks of the encoded
+    data, which hold up to BLOCK_LEN subsequences of given length each, or
+    split the subsequences evenly into a given number of blocks.
 
-def initialized_tree(data, _len):
+    """
+    # Split the subsequences by their first positions, where each block
+    # overlaps the next by (_len - 1) codes to hold its last subsequences
+    num = max(len(enc) - _len + 1, 0)
+    if num_blocks is None:
+        bounds = np.append(np.arange(0, max(num, 1), BLOCK_LEN), num)
+    else:
+        bounds = np.linspace(0, num, num_blocks + 1).astype(int)
+
+    return [(i, enc[i:j + _len - 1]) for i, j in zip(bounds[:-1], bounds[1:])]
+
+
+def merged_counts(results):
+    """
+    Return the codes of distinct subsequences, sorted in ascending order, and
+    their supports summed over a list of partial results of kmer_counts.
+
+    """
+    # Sort the partial results by codes and sum the supports of equal codes
+    codes = np.concatenate([c for c, _ in results])
+    order = np.argsort(codes)
+    counts = np.concatenate([n for _, n in results])[order]
+    del order
+    codes.sort()
+    first = np.flatnonzero(np.diff(codes, prepend=codes[:1] + 1) != 0)
+
+    return codes[first], np.add.reduceat(counts, first) if len(first) else counts
+
+
+def searched(keys, sorted_keys):
+    """
+    Return whether each of the keys is found in a sorted array and, if so, the
+    position where it is found.
+
+    """
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=int)
+    loc = np.searchsorted(sorted_keys, keys)
+    loc[loc == len(sorted_keys)] = 0
+    found = sorted_keys[loc] == keys
+
+    return found, loc
+
+
+def initialized_tree(enc_data, _len, processes=1):
     """
     Return a Tree that stores sequential patterns of given length and their
     support after running the first pass through the data.
 
     Parameters
     ----------
-    data: readfasta Reader
-        Data reader along with a items method to read elements in the data.
+    enc_data: tuple
+        Encoded data and starting positions of sequences in it, as returned by
+        encoded_data.
 
     _len: int
         Length of target sequential patterns in the first pass.
 
+    processes: int
+        Number of worker processes to count subsequences. Default to 1.
+
     """
     tree = Tree()
-    for seq in data.items():
-        for subseq in subsequences(seq, _len):
-            tree.add(subseq, count=1)
+    enc, _ = enc_data
+    codes, counts = kmer_counts(enc, _len, processes)
+    for code, count in zip(codes.tolist(), counts.tolist()):
+        tree.add(code_pattern(code, _len), count=count)
 
     return tree
 
 
-def candidates(tree, _len, thrd):
+def support_upper_bounds(enc_data):
+    """
+    Return upper bounds of supports of sequential patterns given the set of
+    nucleotides they contain, from a segment support map of the data where
+    every sequence is a segment.
+
+    Parameter
+    ---------
+    enc_data: tuple
+        Encoded data and starting positions of sequences in it, as returned by
+        encoded_data.
+
+    Return
+    ------
+    bounds: numpy array
+        Upper bounds indexed by nucleotide masks of patterns (see
+        nucleotide_mask), each of which is the sum over sequences of the
+        minimum count of nucleotides in the set.
+
+    Note
+    ----
+    Every occurrence of a pattern in a sequence contains each nucleotide of
+    the pattern at a distinct position, so the support of the pattern in the
+    sequence cannot exceed the count of any of its nucleotides.
+
+    """
+    enc, starts = enc_data
+    # Count each nucleotide in every sequence, where the data is padded so
+    # that the last sequence is non-empty
+    padded = np.append(enc, INVALID)
+    counts = np.zeros((len(starts), len(NUCLEOTIDES)), dtype=np.int64)
+    if len(starts) > 0:
+        for code in range(len(NUCLEOTIDES)):
+            counts[:, code] = np.add.reduceat(padded == code, starts,
+                                              dtype=np.int64)
+
+    bounds = np.zeros(2**len(NUCLEOTIDES), dtype=np.int64)
+    for mask in range(1, len(bounds)):
+        codes = [code for code in range(len(NUCLEOTIDES)) if mask >> code & 1]
+        bounds[mask] = counts[:, codes].min(axis=1).sum()
+
+    return bounds
+
+
+def nucleotide_mask(seq):
+    """
+    Return the bit mask of the set of nucleotides in a sequential pattern,
+    where the i-th bit indicates the nucleotide of code i.
+
+    """
+    return sum(1 << NUCLEOTIDES.index(nc) for nc in set(seq))
+
+
+def frequent_at_level(tree, _len, thrd):
+    """
+    Return a list of nodes at a given level of the tree whose supports are not
+    less than the threshold.
+
+    """
+    return [node for node in tree.nodes_at_level(_len)
+            if node.has_count_at_least(thrd)]
+
+
+def candidate_pairs(tree, _len, thrd):
+    """
+    Return a generator of pairs of prefix and suffix nodes, both with support
+    not less than the threshold, from which candidate sequential patterns of
+    given length are deduced.
+
+    """
+    # Frequent patterns of length (_len - 1), which are checked only once and
+    # serve as both prefixes and suffixes
+    frequent = frequent_at_level(tree, _len - 1, thrd)
+    suffixes = {node.seq: node for node in frequent}
+    for node_p in frequent:
+        # Search for suffixes that overlap the prefix except for its first
+        # nucleotide
+        overlap = node_p.seq[1:]
+        for nc in NUCLEOTIDES:
+            node_s = suffixes.get(overlap + nc)
+            if node_s is not None:
+                yield node_p, node_s
+
+
+def candidates(tree, _len, thrd, bounds=None):
     """
     Return a generator of candidate sequential patterns of given length that
     can be deduced from the prefix and suffix patterns with support not less
     than the given threshold.
 
+    If upper bounds of supports, as returned by support_upper_bounds, are
+    given, candidates whose bounds are less than the threshold are pruned.
+
     """
-    # For all possible prefix patterns with support not less than the threshold
-    for node_p in tree.nodes_at_level(_len - 1):
-        if node_p.has_count_at_least(thrd):
-            prefix = node_p.seq
-            # Examine existence of the node representing intersection between
-            # the prefix and suffix
-            try:
-                node_i = tree.pattern(prefix[1:])
-            except PatternNotFound:
-                continue
-            # Seach for suffixes also with support not less than the threshold
-            for node_s in node_i.all_children():
-                if node_s.has_count_at_least(thrd):
-                    suffix = node_s.seq
-                    yield prefix + suffix[-1:]
+    for node_p, node_s in candidate_pairs(tree, _len, thrd):
+        seq = node_p.seq + node_s.seq[-1:]
+        if bounds is None or bounds[nucleotide_mask(seq)] >= thrd:
+            yield seq
 
 
-def run_apriori(data, tree, _len, thrd):
+def run_apriori(enc_data, tree, _len, thrd, processes=1, bounds=None):
     """
     Run a single iteration of the A-priori algorithm and update the tree with
     sequential patterns of given length with supports not less than the
@@ -277,8 +608,9 @@ def run_apriori(data, tree, _len, thrd):
 
     Parameters
     ----------
-    data: readfasta Reader
-        Data reader along with an items method to read elements in the data.
+    enc_data: tuple
+        Encoded data and starting positions of sequences in it, as returned by
+        encoded_data.
 
     tree: Tree
         Tree object storing sequential patterns.
@@ -289,30 +621,45 @@ def run_apriori(data, tree, _len, thrd):
     thrd: int
         Support threshold of sequential patterns.
 
+    processes: int
+        Number of worker processes to count subsequences. Default to 1.
+
+    bounds: numpy array or None
+        If not None, upper bounds of supports as returned by
+        support_upper_bounds, used to prune candidates before counting.
+
     """
-    # Add candidate patterns to the tree
-    for seq in candidates(tree, _len, thrd):
-        tree.add(seq)
-    # Pass the data once and obtain supports of the candidates
-    for seq in data.items():
-        for subseq in subsequences(seq, _len):
-            tree.increment_count(subseq, count=1)
+    seqs = list(candidates(tree, _len, thrd, bounds))
+    cand_codes = np.array([pattern_code(seq) for seq in seqs], dtype=np.uint64)
+    # Pass the data once and obtain supports of the candidates only
+    enc, _ = enc_data
+    order = np.argsort(cand_codes)
+    counts = np.zeros(len(seqs), dtype=np.int64)
+    counts[order] = candidate_counts(enc, _len, cand_codes[order], processes)
+    # Add candidate patterns to the tree along with their supports, if any
+    for seq, count in zip(seqs, counts.tolist()):
+        tree.add(seq, count=count if count > 0 else None)
 
 
 def assign_pattern_index(tree, _len, thrd):
     """
     Add an index attribute to patterns of given length in the tree, whose
-    supports are not less than the threshold.
+    supports are not less than the threshold, and return the total number of
+    frequent subsequences of these patterns.
 
     """
     idx = 0
+    total = 0
     for node in tree.nodes_at_level(_len):
         if node.has_count_at_least(thrd):
             node.idx = idx
             idx += 1
+            total += node.count
+
+    return total
 
 
-def initialized_queue(data, tree, _len, thrd):
+def initialized_queue(enc_data, tree, _len, thrd):
     """
     Return a queue that stores position information of frequent subsequences
     of given length. Frequent sequential patterns in the tree must have the
@@ -320,8 +667,9 @@ def initialized_queue(data, tree, _len, thrd):
 
     Parameters
     ----------
-    data: readfasta Reader
-        Data reader along with an items method to read elements in the data.
+    enc_data: tuple
+        Encoded data and starting positions of sequences in it, as returned by
+        encoded_data.
 
     tree: Tree
         Tree object storing sequential patterns.
@@ -334,24 +682,39 @@ def initialized_queue(data, tree, _len, thrd):
 
     Return
     ------
-    queue: list
-        List of frequent subsequences of gien length that have beendiscovered,
-        each of whose elements is a tuple of sequence ID, first position of the
-        subsequence and the sequential pattern index. The ordering of
+    queue: tuple
+        Frequent subsequences of given length that have been discovered, as a
+        tuple of numpy arrays of sequence IDs, first positions of the
+        subsequences and the sequential pattern indices. The ordering of
         subsequences remains the same as they were read from the data.
 
     """
-    queue = list()
-    for _id, seq in enumerate(data.items()):
-        for pos, subseq in enumerate(subsequences(seq, _len)):
-            try:
-                node = tree.pattern(subseq)
-                if node.has_count_at_least(thrd):
-                    queue.append((_id, pos, node.idx))
-            except PatternNotFound:
-                continue
-
-    return queue
+    # Sort the codes of frequent patterns along with their indices
+    nodes = frequent_at_level(tree, _len, thrd)
+    freq_codes = np.array([pattern_code(node.seq) for node in nodes],
+                          dtype=np.uint64)
+    freq_idx = np.array([node.idx for node in nodes], dtype=np.int64)
+    order = np.argsort(freq_codes)
+    freq_codes, freq_idx = freq_codes[order], freq_idx[order]
+
+    # Search for frequent subsequences block by block, and fill in their
+    # sequence IDs and positions within the sequences, where the queue size is
+    # the total support of the frequent patterns
+    enc, starts = enc_data
+    size = sum(node.count for node in nodes)
+    ids, pos, idx = (np.empty(size, dtype=np.int32) for _ in range(3))
+    end = 0
+    for offset, block in kmer_blocks(enc, _len):
+        block_pos, codes = kmer_codes(block, _len, return_pos=True)
+        found, loc = searched(codes, freq_codes)
+        block_pos = block_pos[found] + offset
+        block_ids = np.searchsorted(starts, block_pos, side='right') - 1
+        start, end = end, end + len(block_pos)
+        ids[start:end] = block_ids
+        pos[start:end] = block_pos - starts[block_ids]
+        idx[start:end] = freq_idx[loc[found]]
+
+    return ids, pos, idx
 
 
 def candidate_mappings(tree, _len, thrd):
@@ -361,27 +724,13 @@ def candidate_mappings(tree, _len, thrd):
     (suffix) patterns must have the attribute 'idx'.
 
     """
-    idx = 0  # Index of candidate pattern
-    # For all possible prefix patterns with support not less than the threshold
-    for node_p in tree.nodes_at_level(_len - 1):
-        if node_p.has_count_at_least(thrd):
-            prefix = node_p.seq
-            # Examine existence of the node representing intersection between
-            # the prefix and suffix
-            try:
-                node_i = tree.pattern(prefix[1:])
-            except PatternNotFound:
-                continue
-            # Seach for suffixes also with support not less than the threshold
-            for node_s in node_i.all_children():
-                if node_s.has_count_at_least(thrd):
-                    suffix = node_s.seq
-                    seq = prefix + suffix[-1:]
-                    yield (seq, (node_p.idx, node_s.idx), idx)
-                    idx += 1
-
-
-def run_position(queue, tree, _len, thrd):
+    pairs = candidate_pairs(tree, _len, thrd)
+    for idx, (node_p, node_s) in enumerate(pairs):
+        seq = node_p.seq + node_s.seq[-1:]
+        yield (seq, (node_p.idx, node_s.idx), idx)
+
+
+def run_position(queue, tree, _len, thrd, out=None):
     """
     Run a single iteration of the position-based algorithm and update the tree
     with sequential patterns of given length with supports not less than the
@@ -389,10 +738,10 @@ def run_position(queue, tree, _len, thrd):
 
     Parameters
     ----------
-    queue: list
-        List of frequent subsequences discovered in the previous iteration,
-        each of whose elements is a tuple of sequence ID, first position of the
-        subsequence and the sequential pattern index.
+    queue: tuple
+        Frequent subsequences discovered in the previous iteration, as a tuple
+        of numpy arrays of sequence IDs, first positions of the subsequences
+        and the sequential pattern indices.
 
     tree: Tree
         Tree object storing sequential patterns.
@@ -403,6 +752,17 @@ def run_position(queue, tree, _len, thrd):
     thrd: int
         Support threshold of sequential patterns.
 
+    out: tuple or None
+        If not None, buffers in the same form as the queue to store the
+        returned queue, which must be at least as long as the queue and must
+        not share memory with it. Default to None.
+
+    Return
+    ------
+    queue: tuple
+        Frequent subsequences discovered in the current iteration, in the same
+        form as the given queue, which are views of the buffers if given.
+
     Note
     ----
     Invariance: The ordering of subsequences in the queue remains the same as
@@ -410,37 +770,51 @@ def run_position(queue, tree, _len, thrd):
 
     """
     # If the queue is empty, do nothing
-    if len(queue) == 0:
-        return
+    ids, pos, idx = queue
+    if len(ids) == 0:
+        return queue
 
     # Pre-computation to:
     # 1. Add candidate patterns to the tree with indices
-    # 2. Build a mapping from prefix and suffix indices to the candidate index
+    # 2. Build a sorted table from prefix and suffix indices, packed into a
+    #    single key, to the candidate index
     # 3. Build a dictionary mapping from candidate index to sequential pattern
-    index_map = dict()
+    keys = list()
+    vals = list()
     pattern = dict()
-    for seq, indices, cand_idx in candidate_mappings(tree, _len, thrd):
+    for seq, (idx_p, idx_s), cand_idx in candidate_mappings(tree, _len, thrd):
         tree.add(seq, attr_val={'idx': cand_idx})
-        index_map[indices] = cand_idx
+        keys.append((idx_p << 32) | idx_s)
+        vals.append(cand_idx)
         pattern[cand_idx] = seq
+    keys = np.array(keys, dtype=np.int64)
+    order = np.argsort(keys)
+    keys, vals = keys[order], np.array(vals, dtype=np.int32)[order]
 
     # Search for occurence of candidate patterns over adjacent subsequences in
-    # the queue from the beginning, and increment supports in the tree
-    new_queue = list()
-    current_ID, current_pos, current_idx = queue.pop(0)
-    while len(queue) > 0:
-        next_ID, next_pos, next_idx = queue.pop(0)
-        if (next_ID == current_ID) and (next_pos - current_pos == 1):
-            # If the adjacent patterns are prefix and suffix of a candidate
-            if (current_idx, next_idx) in index_map:
-                cand_idx = index_map[(current_idx, next_idx)]
-                new_queue.append((current_ID, current_pos, cand_idx))
-                tree.increment_count(pattern[cand_idx], count=1)
-        current_ID, current_pos, current_idx = next_ID, next_pos, next_idx
-
-    # Update the queue to frequent subsequences discovered in the current
-    # iteration
-    queue.extend(new_queue)
+    # the queue, that is subsequences in the same sequence whose positions
+    # differ by one
+    first = np.flatnonzero((np.diff(ids) == 0) & (np.diff(pos) == 1))
+    pair_keys = (idx[first].astype(np.int64) << 32) | idx[first + 1]
+    # If the adjacent patterns are prefix and suffix of a candidate
+    found, loc = searched(pair_keys, keys)
+    first, loc = first[found], loc[found]
+
+    # Store frequent subsequences discovered in the current iteration
+    num = len(first)
+    if out is None:
+        out = tuple(np.empty(num, dtype=np.int32) for _ in range(3))
+    new_queue = tuple(array[:num] for array in out)
+    np.take(ids, first, out=new_queue[0])
+    np.take(pos, first, out=new_queue[1])
+    np.take(vals, loc, out=new_queue[2])
+
+    # Increment supports in the tree
+    counts = np.bincount(new_queue[2], minlength=len(pattern))
+    for cand_idx in np.flatnonzero(counts).tolist():
+        tree.increment_count(pattern[cand_idx], count=int(counts[cand_idx]))
+
+    return new_queue
 
 
 def number_of_freq_subseq(tree, _len, thrd):
@@ -458,7 +832,7 @@ def number_of_freq_subseq(tree, _len, thrd):
 
 
 def frequent_patterns(data, min_len, max_len, thrd, counter=None,
-                      method='hybrid', verbose=False):
+                      method='hybrid', verbose=False, processes=1):
     """
     Return a generator of sequential patterns and supports, which have length
     not less than a given minimum and support not less than a given threshold,
@@ -473,7 +847,9 @@ def frequent_patterns(data, min_len, max_len, thrd, counter=None,
         Minimum length of sequential patterns of interests.
 
     max_len: int
-        Maximum length of sequential patterns of interests.
+        Maximum length of sequential patterns of interests, which must not
+        exceed MAX_CODE_LEN since patterns are packed into 64-bit codes. A
+        ValueError exception is raised otherwise.
 
     thrd: int
         Support threshold of sequential patterns.
@@ -488,29 +864,50 @@ def frequent_patterns(data, min_len, max_len, thrd, counter=None,
     verbose: bool
         Whether to log the process.
 
+    processes: int
+        Number of worker processes to count subsequences in passes through the
+        data. Default to 1.
+
     """
+    if max_len > MAX_CODE_LEN:
+        raise ValueError(f'Pattern length must not exceed {MAX_CODE_LEN}.')
+
+    # Encode the data once, which is shared by all passes through the data,
+    # and bound the supports of candidates to be counted by A-priori
+    enc_data = encoded_data(data)
+    bounds = support_upper_bounds(enc_data) if method != 'position' else None
+
     # Build a Tree to store sequential patterns
     _len = min_len
-    tree = initialized_tree(data, _len)
+    tree = initialized_tree(enc_data, _len, processes)
     increment(counter)
 
+    # Memoize the number of frequent subsequences of each length, which is
+    # needed both to choose the algorithm and to log the process
+    nums = dict()
+
+    def num_freq_subseq(_len):
+        if _len not in nums:
+            nums[_len] = number_of_freq_subseq(tree, _len, thrd)
+        return nums[_len]
+
     if method == 'position':
         # If the size of the queue to be constructed does not fit in the
         # allocated memory, raise an ExceedAllocatedMemory exception.
-        num = number_of_freq_subseq(tree, _len, thrd)
+        num = nums[_len] = assign_pattern_index(tree, _len, thrd)
         if num > MAX_SIZE:
             raise ExceedAllocatedMemory
         # Otherwise build the queue to store position information
         else:
-            assign_pattern_index(tree, _len, thrd)
-            queue = initialized_queue(data, tree, _len, thrd)
+            queue = initialized_queue(enc_data, tree, _len, thrd)
+            buffers = [queue, tuple(np.empty_like(array) for array in queue)]
             increment(counter)
 
     elif method == 'hybrid':
         use_apriori = True
 
     if verbose:
-        num = number_of_freq_subseq(tree, _len, thrd)
+        num = num_freq_subseq(_len)
         logging.info('Initialization is done. {} instances found.'.format(num))
 
     # Iterate over all pattern length of interests
@@ -519,27 +916,32 @@ def frequent_patterns(data, min_len, max_len, thrd, counter=None,
             # If a queue can fit in the allocated memory, use the
             # position-based; otherwise, use the A-priori algorithm
             if use_apriori:
-                if number_of_freq_subseq(tree, _len, thrd) <= MAX_SIZE:
+                if num_freq_subseq(_len) <= MAX_SIZE:
                     use_apriori = False
                     assign_pattern_index(tree, _len, thrd)
-                    queue = initialized_queue(data, tree, _len, thrd)
+                    queue = initialized_queue(enc_data, tree, _len, thrd)
+                    buffers = [queue, tuple(np.empty_like(array)
+                                            for array in queue)]
                     increment(counter)
         _len += 1
 
         if method == 'apriori':
-            run_apriori(data, tree, _len, thrd)
+            run_apriori(enc_data, tree, _len, thrd, processes, bounds)
             increment(counter)
         elif method == 'position':
-            run_position(queue, tree, _len, thrd)
+            queue = run_position(queue, tree, _len, thrd, out=buffers[1])
+            buffers.reverse()
         elif method == 'hybrid':
             if use_apriori:
-                run_apriori(data, tree, _len, thrd)
+                run_apriori(enc_data, tree, _len, thrd, processes, bounds)
                 increment(counter)
             else:
-                run_position(queue, tree, _len, thrd)
+                queue = run_position(queue, tree, _len, thrd,
+                                     out=buffers[1])
+                buffers.reverse()
 
         if verbose:
-            num = number_of_freq_subseq(tree, _len, thrd)
+            num = num_freq_subseq(_len)
             logging.info('An iteration is done. {} instances found.'.format(num))
 
     return tree.all_patterns_at_least(thrd)
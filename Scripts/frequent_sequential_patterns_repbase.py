@@ -20,7 +20,7 @@ def main():
     """
     # Compute the support thresholds of significance
     data = Reader('../Data/repbase_arabidopsis_thaliana_TE.fasta')
-    num_nc = sum([len(seq) for seq in data.items()])
+    num_nc = data.total_length()
     len_thrd = thresholds(num_nc, MIN_LEN, THRD, CONF)
 
     # Search for frequent patterns of significance
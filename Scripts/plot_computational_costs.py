@@ -36,22 +36,25 @@ def binning(x, y, bins):
 
     """
     data = np.array(x)
-    values = np.array(y)
+    values = np.array(y, dtype=float)
     num = len(bins) - 1
-    binned = [list() for _ in range(num)]
 
     # Categorized the data into bins
     # B_0 = [b_0, b_1]; B_i = (b_i, b_i+1]
-    for j in range(len(data)):
-        i = np.argmax(bins[1:] >= data[j])
-        binned[i].append(values[j])
+    idx = np.clip(np.digitize(data, bins[1:], right=True), 0, num - 1)
 
     # Obtain the center of each bin
     centers = bins[:-1] + 0.5 * np.diff(bins)
 
-    # Obtain the means and standard errors of binned function values
-    means = np.array([np.mean(b) for b in binned if b])
-    stderrs = np.array([np.std(b) for b in binned if b])
+    # Obtain the means and standard errors of binned function values from the
+    # sums of values and squared values in each non-empty bin
+    counts = np.bincount(idx, minlength=num)
+    sums = np.bincount(idx, weights=values, minlength=num)
+    sq_sums = np.bincount(idx, weights=values**2, minlength=num)
+    nonempty = counts > 0
+    means = sums[nonempty] / counts[nonempty]
+    stderrs = np.sqrt(np.maximum(sq_sums[nonempty] / counts[nonempty]
+                                 - means**2, 0))
 
     return centers, means, stderrs
 
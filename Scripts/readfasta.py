@@ -1,7 +1,159 @@
 """To read nucleotide sequence data from fasta file."""
 
 
-from Bio import SeqIO
+import mmap
+import os
+import numpy as np
+
+# Global variables
+NUCLEOTIDES = ('A', 'C', 'T', 'G')
+INVALID = len(NUCLEOTIDES)  # Code of characters other than nucleotides
+ENCODING = np.full(256, INVALID, dtype=np.uint8)  # ASCII to nucleotide code
+ENCODING[[ord(nc) for nc in NUCLEOTIDES]] = np.arange(len(NUCLEOTIDES))
+UPPER = bytes.maketrans(b'abcdefghijklmnopqrstuvwxyz',
+                        b'ABCDEFGHIJKLMNOPQRSTUVWXYZ')  # Table to upper case
+WHITESPACE = b' \t\r\n'  # Characters to be removed from sequences
+BLOCK_SIZE = 2**22  # Number of bytes of a memory map scanned or kept at once
+
+
+def _released(buf, start, end):
+    """
+    Release the pages of a memory map between given offsets from the resident
+    memory, where supported, and return the offset up to which pages have been
+    released. Pages are read again from the file if accessed afterwards.
+
+    """
+    if not isinstance(buf, mmap.mmap) or not hasattr(mmap, 'MADV_DONTNEED'):
+        return end
+    start -= start % mmap.PAGESIZE
+    end -= end % mmap.PAGESIZE
+    if end > start:
+        buf.madvise(mmap.MADV_DONTNEED, start, end - start)
+    return end
+
+
+def _record_starts(buf):
+    """
+    Return offsets of the '>' characters which start header lines in a buffer.
+
+    Parameter
+    ---------
+    buf: bytes-like
+        Contents of a fasta file.
+
+    Note
+    ----
+    The buffer is scanned in blocks of BLOCK_SIZE bytes, so that the memory
+    for the comparisons does not grow with the size of the file.
+
+    """
+    a = np.frombuffer(buf, dtype=np.uint8)
+    starts = [np.zeros(0, dtype=np.int64)]
+    for lo in range(0, len(a), BLOCK_SIZE):
+        found = np.flatnonzero(a[lo:lo + BLOCK_SIZE] == 0x3E) + lo
+        # Only the ones at the beginning of a line start a record
+        starts.append(found[(found == 0) | (a[found - 1] == 0x0A)])
+        _released(buf, lo, lo + BLOCK_SIZE - 1)
+
+    return np.concatenate(starts)
+
+
+def _record_offsets(buf):
+    """
+    Return start and end offsets of the sequences in a buffer.
+
+    Parameter
+    ---------
+    buf: bytes-like
+        Contents of a fasta file.
+
+    Note
+    ----
+    A sequence starts at the end of its header line and ends at the start of
+    the next record (or the end of the buffer).
+
+    """
+    starts = _record_starts(buf).tolist()
+    seq_starts = []
+    released = 0  # Offset up to which pages have been released
+    for start in starts:
+        # End of the header line, or of the buffer if there is no newline after
+        end = buf.find(b'\n', start)
+        seq_starts.append(end if end >= 0 else len(buf))
+        if start - released >= BLOCK_SIZE:
+            released = _released(buf, released, start)
+    seq_ends = starts[1:] + [len(buf)]
+    return seq_starts, seq_ends
+
+
+def _whitespace_before(buf, points):
+    """
+    Return a numpy array of the number of whitespaces in a buffer before each
+    of given offsets, which are sorted in ascending order.
+
+    Note
+    ----
+    The buffer is scanned in blocks of BLOCK_SIZE bytes, where whitespaces in
+    a block are located at once and counted before the offsets in the block
+    by a binary search. Pages of a memory map are released once the block has
+    been passed.
+
+    """
+    a = np.frombuffer(buf, dtype=np.uint8)
+    counts = np.zeros(len(points), dtype=np.int64)
+    base = 0  # Number of whitespaces before the current block
+    for lo in range(0, len(a), BLOCK_SIZE):
+        block = a[lo:lo + BLOCK_SIZE]
+        found = np.zeros(len(block), dtype=bool)
+        for c in WHITESPACE:
+            found |= block == c
+        found = np.flatnonzero(found)
+        i, j = np.searchsorted(points, [lo, lo + len(block)])
+        counts[i:j] = base + np.searchsorted(found, points[i:j] - lo)
+        base += len(found)
+        _released(buf, lo, lo + len(block))
+
+    # Offsets at the end of the buffer
+    counts[points >= len(a)] = base
+    return counts
+
+
+def _records(buf, seq_starts, seq_ends):
+    """
+    Return a generator of the bytes of sequences in a buffer between given
+    offsets, as they are in the buffer. Pages of a memory map are released
+    once the sequences in them have been passed.
+
+    """
+    released = 0  # Offset up to which pages have been released
+    for start, end in zip(seq_starts, seq_ends):
+        yield buf[start:end]
+        if end - released >= BLOCK_SIZE:
+            released = _released(buf, released, end)
+
+
+def sequences_bytes(filepath):
+    """
+    Return a generator of sequences (in upper-case bytes) in the data.
+
+    Parameter
+    ---------
+    filepath: str
+        File path to the data, which must be a fasta file.
+
+    Note
+    ----
+    The file is memory-mapped and records are located in vectorized scans for
+    header and newline characters. Each sequence is obtained in a single
+    translation which also strips whitespaces.
+
+    """
+    with open(filepath, 'rb') as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for seq in _records(mm, *_record_offsets(mm)):
+                yield seq.translate(UPPER, WHITESPACE)
 
 
 def sequences(filepath):
@@ -14,13 +166,13 @@ def sequences(filepath):
         File path to the data, which must be a fasta file.
 
     """
-    for record in SeqIO.parse(filepath, 'fasta'):
-        yield str(record.seq).upper()
+    for seq in sequences_bytes(filepath):
+        yield seq.decode('ascii')
 
 
-def samples(filepath, seq_IDs):
+def samples_bytes(filepath, seq_IDs):
     """
-    Return a generator of sampled sequences (in strings) from the data.
+    Return a generator of sampled sequences (in upper-case bytes) from the data.
 
     Parameters
     ----------
@@ -33,9 +185,9 @@ def samples(filepath, seq_IDs):
     """
     k = len(seq_IDs)
     idx = 0
-    for i, record in enumerate(SeqIO.parse(filepath, 'fasta')):
+    for i, seq in enumerate(sequences_bytes(filepath)):
         if i == seq_IDs[idx]:
-            yield str(record.seq).upper()
+            yield seq
 
             if idx < k - 1:
                 idx += 1
@@ -43,10 +195,31 @@ def samples(filepath, seq_IDs):
                 break
 
 
+def samples(filepath, seq_IDs):
+    """
+    Return a generator of sampled sequences (in strings) from the data.
+
+    Parameters
+    ----------
+    filepath: str
+        File path to the data, which must be a fasta file.
+
+    seq_IDs: list
+        IDs of sequences in the data to be sampled, which has been sorted.
+
+    """
+    for seq in samples_bytes(filepath, seq_IDs):
+        yield seq.decode('ascii')
+
+
 class Reader:
-    """Data reader of the fasta file."""
+    """
+    Data reader of the fasta file, which is memory-mapped once and keeps the
+    offsets of sequences found in the first pass for later passes.
+
+    """
 
-    def __init__(self, filepath, sample=None):
+    def __init__(self, filepath, sample=None, encoding='str'):
         """
         Initiate reader with file path to the data and additional information.
 
@@ -58,16 +231,92 @@ class Reader:
         sample: list of None
             A list of sampled sequences' ID to be read. Default to None.
 
+        encoding: str
+            Representation of the sequences, which is either 'str' (strings),
+            'bytes' (upper-case bytes) or 'int' (numpy arrays of nucleotide
+            codes as in ENCODING). Default to 'str'.
+
         """
+        if encoding not in ('str', 'bytes', 'int'):
+            raise ValueError('Unknown encoding: {}'.format(encoding))
         self.filepath = filepath
         self.sample = sample
+        self.encoding = encoding
 
-    def items(self):
-        """Return a generator of items in the data."""
+        self._handle = open(filepath, 'rb')
+        if os.fstat(self._handle.fileno()).st_size == 0:
+            self._mm = None  # An empty file cannot be memory-mapped
+        else:
+            self._mm = mmap.mmap(self._handle.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        self._offsets = None
+
+    def __del__(self):
+        """Close the memory map and the file."""
+        mm = getattr(self, '_mm', None)
+        if mm is not None:
+            mm.close()
+        handle = getattr(self, '_handle', None)
+        if handle is not None:
+            handle.close()
+
+    def offsets(self):
+        """
+        Return start and end offsets of the sequences to be read in the memory
+        map, which are found in the first call and cached.
+
+        """
+        if self._offsets is None:
+            if self._mm is None:
+                self._offsets = ([], [])
+            else:
+                self._offsets = _record_offsets(self._mm)
+
+        seq_starts, seq_ends = self._offsets
         if self.sample is None:
-            return sequences(self.filepath)
+            return seq_starts, seq_ends
         else:
-            return samples(self.filepath, self.sample)
+            ids = [i for i in self.sample if i < len(seq_starts)]
+            return [seq_starts[i] for i in ids], [seq_ends[i] for i in ids]
+
+    def items(self):
+        """
+        Return a generator of items in the data, which keeps the reader (and
+        thus the memory map) alive until it is exhausted.
+
+        """
+        encoding = self.encoding
+        for seq in _records(self._mm, *self.offsets()):
+            seq = seq.translate(UPPER, WHITESPACE)
+            if encoding == 'str':
+                yield seq.decode('ascii')
+            elif encoding == 'bytes':
+                yield seq
+            else:
+                yield ENCODING[np.frombuffer(seq, np.uint8)]
+
+    def total_length(self):
+        """
+        Return the total number of nucleotides of sequences in the data.
+
+        Note
+        ----
+        Sequences are not copied out of the memory map. Whitespaces are
+        counted on a numpy view of the map in blocks, and each sequence
+        contributes its number of bytes less the whitespaces in it.
+
+        """
+        if self._mm is None:
+            return 0
+
+        seq_starts, seq_ends = self.offsets()
+        points = np.array(seq_starts + seq_ends, dtype=np.int64)
+        order = np.argsort(points, kind='stable')
+        counts = np.empty(len(points), dtype=np.int64)
+        counts[order] = _whitespace_before(self._mm, points[order])
+        num = len(seq_starts)
+        return int((points[num:] - points[:num]).sum()
+                   - (counts[num:] - counts[:num]).sum())
 
 
 def main():
@@ -1,9 +1,14 @@
 """To compute support thresholds of significance of DNA sequential patterns."""
 
 
+import math
 import numpy as np
-from scipy.special import gammaincc
-from scipy.optimize import root
+from scipy.stats import binom
+
+
+# Global variables
+LEN_CHUNK = 8  # Number of pattern lengths whose thresholds are computed at once
+CHUNK_PROBS = 0.25 ** np.arange(LEN_CHUNK)  # Probability ratios within a chunk
 
 
 class RootFailure(Exception):
@@ -11,6 +16,29 @@ class RootFailure(Exception):
     pass
 
 
+def _thresholds(size, prob, conf):
+    """
+    Return the support thresholds of significance in the binomial null model
+    for given sample sizes and probabilities of patterns, which are NaN where
+    not numerically available.
+
+    Parameters
+    ----------
+    size: int or numpy array
+        Size of hypothetical samples from the null model.
+
+    prob: float or numpy array
+        Probability that any specific pattern is realized.
+
+    conf: float
+        Confidence level of significance.
+
+    """
+    # The quantile k has P(X <= k) >= conf, so the threshold is k + 1 (see
+    # significant_support)
+    return binom.isf(1.0 - conf, size, prob) + 1
+
+
 def significant_support(size, _len, conf):
     """
     Return the support threshold for a pattern of given length such that the
@@ -31,38 +59,26 @@ def significant_support(size, _len, conf):
     Return
     ------
     thrd: int
-        Support threshold of significance, that is the minimum support at which
-        the cumulative distribution function is greater than the confidence
-        level.
+        Support threshold of significance, that is the minimum support t such
+        that the probability of a support less than t, P(X < t), is not less
+        than the confidence level.
 
     Note
     ----
-    The probability distribution of the null model is exact binomial. For
-    simplicity computing the cumulative distribution, it is assumed that the
-    sample size is large and the distribution is approximately Poisson, whose
-    cumulative form is a regularized Gamma function.
+    The probability distribution of the null model is exact binomial. Its
+    inverse survival function at (1 - conf) gives the smallest count k with
+    P(X <= k) >= conf, which is the same as P(X < k + 1) >= conf, so the
+    threshold is k + 1 rather than k.
+
+    A RootFailure exception is raised if the threshold is not numerically
+    available.
 
     """
     prob = 0.25 ** _len  # Probability that any specific pattern is realized
-    mean = size * prob
-
-    def cdf(x):
-        return gammaincc(x, mean)
-
-    # Solve for the threshold such that the cumulative function equates to the
-    # confidence level
-    def func(x):
-        return cdf(x) - conf
-    guess = mean + np.sqrt(mean)
-    sol = root(func, guess)
-
-    # Return the threshold if root finding was successful
-    # Otherwise raise a RootFailure exception
-    if sol.success:
-        thrd = np.ceil(sol.x[0])
-        return thrd
-    else:
+    thrd = _thresholds(size, prob, conf)
+    if math.isnan(thrd):
         raise RootFailure
+    return int(thrd)
 
 
 def thresholds(num, min_len, lwr_bd, conf):
@@ -91,17 +107,30 @@ def thresholds(num, min_len, lwr_bd, conf):
         Dictinoary mapping from pattern length to the corresponding support
         thresholds.
 
+    Note
+    ----
+    Thresholds are computed in chunks of lengths in the same binomial model as
+    significant_support().
+
     """
     len_thrd = dict()
-    _len = min_len
+    start = min_len
+    prob = 0.25 ** min_len  # Probability of a pattern at the chunk start
     reach_bd = False  # Indicator of whether the lower bound is reached
     while not reach_bd:
-        thrd = significant_support(num - _len, _len, conf)
-        if thrd >= lwr_bd:
-            len_thrd[_len] = thrd
-        else:
+        lens = np.arange(start, start + LEN_CHUNK)
+        thrds = _thresholds(num - lens, prob * CHUNK_PROBS, conf)
+        # Keep thresholds up to the first one below the lower bound, and raise
+        # a RootFailure exception if any threshold before it is not available
+        stop = np.flatnonzero(np.isnan(thrds) | (thrds < lwr_bd))
+        if stop.size > 0:
+            if np.isnan(thrds[stop[0]]):
+                raise RootFailure
+            lens, thrds = lens[:stop[0]], thrds[:stop[0]]
             reach_bd = True
-        _len += 1
+        len_thrd.update(zip(lens.tolist(), thrds.astype(np.int64).tolist()))
+        start += LEN_CHUNK
+        prob *= 0.25 ** LEN_CHUNK
 
     return len_thrd
 
@@ -1,7 +1,7 @@
 """Obtain support thresholds of significance for Arabdopsis thiliana data."""
 
 
-from readfasta import sequences
+from readfasta import Reader
 from sigthrd import thresholds
 import matplotlib.pyplot as plt
 import logging
@@ -19,7 +19,7 @@ def main():
     """Obtain and plot the support thresholds. of significance."""
     # Extract total number of nucleotides from the data
     logging.info('Start.')
-    num_nc = sum([len(seq) for seq in sequences('../Data/repbase_arabidopsis_thaliana_TE.fasta')])
+    num_nc = Reader('../Data/repbase_arabidopsis_thaliana_TE.fasta').total_length()
     logging.info('Data loaded.')
 
     # Obtain support thresholds of significance
@@ -2,6 +2,10 @@
 
 
 import unittest
+from unittest import mock
+from freqsubseq import encoded, pattern_code, code_pattern, kmer_codes
+from freqsubseq import encoded_data, kmer_counts
+from freqsubseq import support_upper_bounds, nucleotide_mask
 from freqsubseq import initialized_tree, candidates, run_apriori
 from freqsubseq import assign_pattern_index, initialized_queue
 from freqsubseq import candidate_mappings, run_position
@@ -17,26 +21,68 @@ class AuxReader:
         self.seqs = seqs
 
     def items(self):
-        """Return a generator of sequences that are stored."""
-        for seq in self.seqs:
-            yield seq
+        """Return an iterator of sequences that are stored."""
+        return iter(self.seqs)
 
 
 class AlgorithmTestCase(unittest.TestCase):
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         seq = 'ACGATTCGATCG'
         num = 2
-        self.data = AuxReader([seq for _ in range(num)])
-        self.thrd = 4
-        self.min_len = 1
-        self.max_len = 3
-        self.ground_truth = {('A', 6), ('C', 6), ('G', 6), ('T', 6), ('AT', 4),
-                             ('CG', 6), ('GA', 4), ('TC', 4), ('CGA', 4),
-                             ('GAT', 4), ('TCG', 4)}
+        cls.data = AuxReader([seq for _ in range(num)])
+        cls.enc_data = encoded_data(cls.data)
+        cls.thrd = 4
+        cls.min_len = 1
+        cls.max_len = 3
+        cls.ground_truth = {('A', 6), ('C', 6), ('G', 6), ('T', 6), ('AT', 4),
+                            ('CG', 6), ('GA', 4), ('TC', 4), ('CGA', 4),
+                            ('GAT', 4), ('TCG', 4)}
+
+    def test_kmer_codes(self):
+        m = 2
+        seq = 'ACNGATTcg'
+        pos, codes = kmer_codes(encoded(seq), m, return_pos=True)
+        self.assertEqual(pos.tolist(), [0, 3, 4, 5])
+        self.assertEqual(kmer_codes(encoded(seq), m).tolist(), codes.tolist())
+        patterns = [code_pattern(code, m) for code in codes]
+        self.assertEqual(patterns, ['AC', 'GA', 'AT', 'TT'])
+        self.assertEqual([pattern_code(p) for p in patterns], codes.tolist())
+
+    def test_encoded_data(self):
+        enc, starts = self.enc_data
+        self.assertEqual(starts.tolist(), [0, 13])
+
+        # Sequences given in bytes or already encoded
+        for seqs in ([seq.encode() for seq in self.data.items()],
+                     [encoded(seq) for seq in self.data.items()]):
+            enc_other, starts_other = encoded_data(AuxReader(seqs))
+            self.assertEqual(enc_other.tolist(), enc.tolist())
+            self.assertEqual(starts_other.tolist(), starts.tolist())
+
+    def test_kmer_counts(self):
+        m = 2
+        enc, _ = self.enc_data
+        codes, counts = kmer_counts(enc, m)
+        counts_true = {('AC', 2), ('AT', 4), ('CG', 6), ('GA', 4), ('TT', 2),
+                       ('TC', 4)}
+        self.assertEqual({(code_pattern(code, m), count)
+                          for code, count in zip(codes, counts)}, counts_true)
+
+        # Counts split among worker processes
+        codes, counts = kmer_counts(enc, m, processes=3)
+        self.assertEqual({(code_pattern(code, m), count)
+                          for code, count in zip(codes, counts)}, counts_true)
+
+        # Counts merged over small blocks of the data
+        with mock.patch('freqsubseq.BLOCK_LEN', 3):
+            codes, counts = kmer_counts(enc, m)
+        self.assertEqual({(code_pattern(code, m), count)
+                          for code, count in zip(codes, counts)}, counts_true)
 
     def test_initialized_tree(self):
         m = 2
-        tree = initialized_tree(self.data, m)
+        tree = initialized_tree(self.enc_data, m)
 
         # Check the edgelist of the tree
         el_true = {('', 'A'), ('', 'C'), ('', 'G'), ('', 'T'), ('A', 'AC'),
@@ -55,15 +101,32 @@ class AlgorithmTestCase(unittest.TestCase):
 
     def test_candidates(self):
         m = 2
-        tree = initialized_tree(self.data, m)
+        tree = initialized_tree(self.enc_data, m)
         cand_true = {'ATC', 'CGA', 'GAT', 'TCG'}
         cand = set(candidates(tree, m+1, self.thrd))
         self.assertEqual(cand, cand_true)
 
+    def test_support_upper_bounds(self):
+        enc_data = encoded_data(AuxReader(['AACG', 'AAT', '', 'TTTG']))
+        bounds = support_upper_bounds(enc_data)
+        self.assertEqual(bounds[nucleotide_mask('A')], 4)
+        self.assertEqual(bounds[nucleotide_mask('TTT')], 4)
+        self.assertEqual(bounds[nucleotide_mask('AT')], 1)
+        self.assertEqual(bounds[nucleotide_mask('GAT')], 0)
+        self.assertEqual(bounds[nucleotide_mask('TG')], 1)
+
+        # Prune candidates with upper bounds less than the threshold
+        tree = initialized_tree(self.enc_data, 2)
+        bounds = support_upper_bounds(self.enc_data)
+        bounds[nucleotide_mask('GAT')] = self.thrd - 1
+        cand_true = {'ATC', 'CGA', 'TCG'}
+        cand = set(candidates(tree, 3, self.thrd, bounds))
+        self.assertEqual(cand, cand_true)
+
     def test_run_apriori(self):
         m = 2
-        tree = initialized_tree(self.data, m)
-        run_apriori(self.data, tree, m+1, self.thrd)
+        tree = initialized_tree(self.enc_data, m)
+        run_apriori(self.enc_data, tree, m+1, self.thrd)
 
         # Check the edgelist of the tree
         el_true = {('', 'A'), ('', 'C'), ('', 'G'), ('', 'T'), ('A', 'AC'),
@@ -82,8 +145,9 @@ class AlgorithmTestCase(unittest.TestCase):
 
     def test_assign_pattern_index(self):
         m = 2
-        tree = initialized_tree(self.data, m)
-        assign_pattern_index(tree, m, self.thrd)
+        tree = initialized_tree(self.enc_data, m)
+        num = assign_pattern_index(tree, m, self.thrd)
+        self.assertEqual(num, 18)
         has_idx_ture = {('AC', False), ('AT', True), ('CG', True),
                         ('GA', True), ('TT', False), ('TC', True)}
         has_idx = {(node.seq, hasattr(node, 'idx'))
@@ -92,7 +156,7 @@ class AlgorithmTestCase(unittest.TestCase):
 
     def test_initialized_queue(self):
         m = 2
-        tree = initialized_tree(self.data, m)
+        tree = initialized_tree(self.enc_data, m)
         assign_pattern_index(tree, m, self.thrd)
         idx = {seq: tree.pattern(seq).idx
                for seq in ['AT', 'CG', 'GA', 'TC']}
@@ -102,12 +166,19 @@ class AlgorithmTestCase(unittest.TestCase):
         queue_true += [(1, 1, idx['CG']), (1, 2, idx['GA']), (1, 3, idx['AT']),
                        (1, 5, idx['TC']), (1, 6, idx['CG']), (1, 7, idx['GA']),
                        (1, 8, idx['AT']), (1, 9, idx['TC']), (1, 10, idx['CG'])]
-        queue = initialized_queue(self.data, tree, m, self.thrd)
+        queue = initialized_queue(self.enc_data, tree, m, self.thrd)
+        queue = list(zip(*(array.tolist() for array in queue)))
+        self.assertEqual(queue, queue_true)
+
+        # Queue built over small blocks of the data
+        with mock.patch('freqsubseq.BLOCK_LEN', 3):
+            queue = initialized_queue(self.enc_data, tree, m, self.thrd)
+        queue = list(zip(*(array.tolist() for array in queue)))
         self.assertEqual(queue, queue_true)
 
     def test_cadidate_mappings(self):
         m = 2
-        tree = initialized_tree(self.data, m)
+        tree = initialized_tree(self.enc_data, m)
         assign_pattern_index(tree, m, self.thrd)
         idx = {seq: tree.pattern(seq).idx
                for seq in ['AT', 'CG', 'GA', 'TC']}
@@ -126,14 +197,15 @@ class AlgorithmTestCase(unittest.TestCase):
 
     def test_run_position(self):
         m = 2
-        tree = initialized_tree(self.data, m)
+        tree = initialized_tree(self.enc_data, m)
         assign_pattern_index(tree, m, self.thrd)
-        queue = initialized_queue(self.data, tree, m, self.thrd)
-        run_position(queue, tree, m+1, self.thrd)
+        queue = initialized_queue(self.enc_data, tree, m, self.thrd)
+        queue = run_position(queue, tree, m+1, self.thrd)
         idx = {seq: tree.pattern(seq).idx
                for seq in ['ATC', 'CGA', 'GAT', 'TCG']}
 
         # Check queue
+        queue = list(zip(*(array.tolist() for array in queue)))
         queue_true = [(0, 1, idx['CGA']), (0, 2, idx['GAT']),
                       (0, 5, idx['TCG']), (0, 6, idx['CGA']),
                       (0, 7, idx['GAT']), (0, 8, idx['ATC']), (0, 9, idx['TCG'])]
@@ -149,7 +221,7 @@ class AlgorithmTestCase(unittest.TestCase):
 
     def test_number_of_freq_subseq(self):
         m = 1
-        tree = initialized_tree(self.data, m)
+        tree = initialized_tree(self.enc_data, m)
         num = number_of_freq_subseq(tree, m, self.thrd)
         self.assertEqual(num, 24)
 
@@ -0,0 +1,94 @@
+"""Test the fasta reader in readfasta.py."""
+
+
+import os
+import tempfile
+import unittest
+from readfasta import sequences, sequences_bytes, samples, Reader
+
+
+class ReaderTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Fasta file with CRLF line endings, lower cases, blank lines, tabs,
+        # text before the first record, '>' in the middle of a line, an empty
+        # record and a final header without newline
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.filepath = os.path.join(cls.tmpdir.name, 'test.fasta')
+        with open(cls.filepath, 'wb') as handle:
+            handle.write(b'Some text before the first record.\n'
+                         b'>seq0 first > header\r\n'
+                         b'ACgt\r\n'
+                         b'\r\n'
+                         b'nn\tAC\r\n'
+                         b'>seq1 empty\n'
+                         b'>seq2\n'
+                         b'AC>GT\n'
+                         b'\n'
+                         b'ggc\n'
+                         b'>seq3 without newline')
+        cls.seqs = ['ACGTNNAC', '', 'AC>GTGGC', '']
+
+        # Empty fasta file
+        cls.emptypath = os.path.join(cls.tmpdir.name, 'empty.fasta')
+        open(cls.emptypath, 'wb').close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_sequences(self):
+        self.assertEqual(list(sequences(self.filepath)), self.seqs)
+        self.assertEqual(list(sequences_bytes(self.filepath)),
+                         [seq.encode() for seq in self.seqs])
+
+    def test_empty_file(self):
+        self.assertEqual(list(sequences(self.emptypath)), [])
+        reader = Reader(self.emptypath)
+        self.assertEqual(list(reader.items()), [])
+        self.assertEqual(reader.total_length(), 0)
+
+    def test_samples(self):
+        seq_IDs = [0, 2, 5]
+        seqs_true = [self.seqs[0], self.seqs[2]]
+        self.assertEqual(list(samples(self.filepath, seq_IDs)), seqs_true)
+        reader = Reader(self.filepath, seq_IDs)
+        self.assertEqual(list(reader.items()), seqs_true)
+
+    def test_items(self):
+        reader = Reader(self.filepath)
+        self.assertEqual(list(reader.items()), self.seqs)
+        # Later passes read the same sequences
+        self.assertEqual(list(reader.items()), self.seqs)
+
+    def test_unreferenced_reader(self):
+        # Items are read even if the reader itself is not referenced
+        for encoding in ('str', 'bytes', 'int'):
+            seqs = [seq for seq in Reader(self.filepath,
+                                          encoding=encoding).items()]
+            self.assertEqual(len(seqs), len(self.seqs))
+
+    def test_encoding(self):
+        reader = Reader(self.filepath, encoding='bytes')
+        self.assertEqual(list(reader.items()),
+                         [seq.encode() for seq in self.seqs])
+
+        reader = Reader(self.filepath, [0, 1], encoding='int')
+        codes = [seq.tolist() for seq in reader.items()]
+        self.assertEqual(codes, [[0, 1, 3, 2, 4, 4, 0, 1], []])
+
+        self.assertRaises(ValueError, Reader, self.filepath, encoding='ascii')
+
+    def test_total_length(self):
+        reader = Reader(self.filepath)
+        self.assertEqual(reader.total_length(), 16)
+        self.assertEqual(reader.total_length(),
+                         sum(len(seq) for seq in reader.items()))
+
+        reader = Reader(self.filepath, [2, 3])
+        self.assertEqual(reader.total_length(),
+                         sum(len(seq) for seq in reader.items()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+"""Test the support thresholds of significance in sigthrd.py."""
+
+
+import unittest
+from sigthrd import significant_support, thresholds, RootFailure
+
+
+class SignificanceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.num = 10**6
+        self.min_len = 3
+        self.lwr_bd = 100
+        self.conf = 0.9
+        self.len_thrd = {3: 15785, 4: 3987, 5: 1018, 6: 265}
+
+    def test_significant_support(self):
+        for _len, thrd in self.len_thrd.items():
+            self.assertEqual(
+                significant_support(self.num - _len, _len, self.conf), thrd)
+        self.assertRaises(RootFailure, significant_support, self.num, 3, 1.5)
+
+    def test_thresholds(self):
+        len_thrd = thresholds(self.num, self.min_len, self.lwr_bd, self.conf)
+        self.assertEqual(len_thrd, self.len_thrd)
+
+        # Thresholds not numerically available
+        self.assertRaises(RootFailure, thresholds, self.num, self.min_len,
+                          self.lwr_bd, 1.5)
+        self.assertRaises(RootFailure, thresholds, self.num, self.min_len,
+                          self.lwr_bd, -0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,7 +9,7 @@ class TreeTestCase(unittest.TestCase):
     def setUp(self):
         # Manually built Tree
         self.root = Tree('This is a root.')
-        self.root.A = Tree('This is a child.')
+        self.root.children['A'] = Tree('This is a child.')
 
         # Tree built by add method
         seq = 'ACGATTCGATCG'
@@ -98,6 +98,12 @@ class TreeTestCase(unittest.TestCase):
                   for node in self.tree.nodes_at_level(m)}
         self.assertEqual(counts, counts_true)
 
+    def test_add_below_child(self):
+        # Patterns added below a child are found from the root
+        self.tree.child('A').add('GG', count=1)
+        self.assertIn('AGG', {node.seq for node in self.tree.nodes_at_level(3)})
+        self.assertIn(('AGG', 1), set(self.tree.all_patterns_at_least(1)))
+
     def test_has_count_at_least(self):
         self.assertTrue(self.tree.pattern('ACG').has_count_at_least(0))
         self.assertTrue(self.tree.pattern('ACG').has_count_at_least(1))